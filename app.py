@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import io
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import plotly.express as px
 import time
-import streamlit.components.v1 as components
-from utils import load_data, get_complex_list, IS_SUPABASE_READY
+from utils import load_data, get_complex_list, IS_SUPABASE_READY, BASE_CSS
 from datetime import datetime, timedelta
 
 # Page Config
@@ -14,35 +17,422 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-    <style>
+CUSTOM_CSS = """
     .metric-card {
         background-color: #f0f2f6;
         padding: 20px;
         border-radius: 10px;
         box-shadow: 2px 2px 5px rgba(0,0,0,0.05);
     }
-    .stApp { opacity: 1 !important; }
-    [data-testid="stAppViewContainer"] { opacity: 1 !important; }
-    [data-testid="stSidebar"] { opacity: 1 !important; }
-    header[data-testid="stHeader"] { opacity: 1 !important; }
     * { transition: none !important; }
-    </style>
-""", unsafe_allow_html=True)
+"""
+st.html(f"<style>{BASE_CSS}{CUSTOM_CSS}</style>")
 
 st.title("🏢 부동산 매물 분석 현황판")
 st.markdown("실시간 수집 데이터를 기반으로 한 매물 증감 및 분석 대시보드입니다.")
 
 # --- Auto Refresh Logic (Poll every 5 mins) ---
 refresh_interval_sec = 300 # 5 minutes
-auto_refresh_html = f"""
-<script>
-    var timer = setInterval(function() {{
-        window.location.reload();
-    }}, {refresh_interval_sec * 1000});
-</script>
-"""
-components.html(auto_refresh_html, height=0)
+
+# Timer fragment instead of a JS page reload: the browser keeps its session / Plotly bundle,
+# and the app rerun picks up new data once the cache TTL (same interval) has expired
+st.session_state.rendered_at = time.time()
+
+@st.fragment(run_every=refresh_interval_sec)
+def auto_refresh():
+    # Skip if a widget interaction already redrew the page within the interval
+    # (few seconds of slack for timer jitter)
+    if time.time() - st.session_state.rendered_at >= refresh_interval_sec - 5:
+        st.rerun(scope="app")
+
+auto_refresh()
+
+# --- Helper: Area Type Classifier ---
+# spc2 (m²) ranges [50,70) -> '59', [70,100) -> '84', ... ; anything else / unparsable -> '기타'
+AREA_TYPE_BINS = [50, 70, 100, 135, 165, 200, np.inf]
+AREA_TYPE_LABELS = ['59', '84', '120', '152', '175', '기타']
+TARGET_AREA_TYPES = ['59', '84', '120', '152', '175'] # Types shown on the dashboard
+
+def get_area_types(spc2):
+    """
+    Vectorized area-type classification (one pd.cut pass instead of a Python call per row).
+    Args:
+        spc2 (Series): Exclusive area values (numeric or text).
+    Returns: Series of type labels (object dtype).
+    """
+    spc = pd.to_numeric(spc2, errors='coerce')
+    return pd.cut(spc, AREA_TYPE_BINS, labels=AREA_TYPE_LABELS, right=False).astype(object).fillna('기타')
+
+# --- Cached Data Access ---
+# Columns the dashboard reads/shows. price/lat/lng are never filled by the crawler
+# and created_at duplicates timestamp, so they are not fetched at all.
+LISTING_COLUMNS = ",".join([
+    "articleNo", "atclNm", "rletTpNm", "tradTpNm", "price_int", "spc1", "spc2",
+    "floorInfo", "direction", "tradePrice", "realtorName", "buildingName",
+    "timestamp", "atclFetrDesc", "cfmYmd"
+])
+
+# Every widget click / row selection reruns the whole script. Reuse the last
+# Supabase fetch + DataFrame build until the next auto refresh.
+# cache_resource: the frame is shared as-is (no pickle copy per call) -> treat it as read-only.
+@st.cache_resource(ttl=refresh_interval_sec, show_spinner=False)
+def build_df(complexes):
+    """
+    Loads listings for the given complexes and returns the prepared DataFrame.
+    Args:
+        complexes (tuple): Complex NAMES (tuple so it is hashable as cache key).
+    Returns: DataFrame (empty if nothing was loaded) with attrs['data_version'] = load id.
+             Shared object - do not mutate.
+    """
+    # raise_errors: a failed / partial load raises (exceptions are not cached) instead of
+    # being shared with every session until the TTL expires
+    data = load_data(target_complexes=list(complexes), columns=LISTING_COLUMNS, raise_errors=True)
+    if not data:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(data)
+
+    # --- Data Cleaning (User Request) ---
+    # Exclude anomaly: DMC View Xi (108064) @ 2025-12-14 23:40
+    if 'timestamp' in df.columns and 'atclNm' in df.columns:
+        # Filter specific timestamps for DMC Park View Xi (User Requests: 2025-12-14 23:40, 2025-12-15 00:40)
+        anomalies = ['2025-12-14T23:40', '2025-12-15T00:40']
+        
+        # Construct mask (atclNm == DMC AND timestamp matches any anomaly)
+        mask_dmc = (df['atclNm'] == 'DMC파크뷰자이')
+        mask_ts = df['timestamp'].str.contains('|'.join(anomalies), na=False)
+        
+        anomaly_mask = mask_dmc & mask_ts
+        
+        if anomaly_mask.any():
+            df = df[~anomaly_mask]
+
+    # Parse timestamps once (text mixes 'YYYY-MM-DD HH:MM:SS' and ISO 'T' forms, both ISO8601).
+    # Same convention as the rest of the app: UTC-normalize, then drop tz (naive).
+    # Downstream groupby/compare/max then run on datetime64 instead of strings.
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce', utc=True).dt.tz_localize(None)
+    df = df[df['timestamp'].notna()]
+
+    # Ensure columns (single reindex; existing columns keep their values)
+    df = df.reindex(
+        columns=df.columns.union(["buildingName", "realtorName", "direction"], sort=False),
+        fill_value="정보없음"
+    )
+
+    # Type enforcement for robust set operations
+    # Naver article IDs are numeric -> int64 (ID diffs run as integer sorts); fall back to text otherwise
+    if 'articleNo' in df.columns:
+        article_ids = pd.to_numeric(df['articleNo'], errors='coerce')
+        if article_ids.notna().all():
+            df['articleNo'] = article_ids.astype('int64')
+        else:
+            df['articleNo'] = df['articleNo'].astype(str)
+
+    df['price_eok'] = df['price_int'] / 100000000
+
+    # Area type once for the whole history; every snapshot slice inherits it
+    df['type'] = get_area_types(df['spc2'])
+
+    # Remaining text columns -> Arrow-backed strings (no per-cell PyObject, cheaper st.dataframe serialization)
+    # Numeric columns stay NumPy so price masks never see pd.NA
+    text_cols = df.select_dtypes(include=["object", "string"]).columns
+    df[text_cols] = df[text_cols].astype("string[pyarrow]")
+
+    # Low-cardinality text -> category (int codes for value_counts / isin / ==)
+    # Note: value_counts() on a slice also lists unused categories (count 0)
+    for col in ["atclNm", "realtorName", "buildingName", "direction", "floorInfo"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    # Time-ordered once (stable: rows keep their order within a snapshot), so snapshot and
+    # "history up to ts" lookups are searchsorted slices instead of full-column masks
+    df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+    df.attrs['data_version'] = time.time_ns() # Load id (see derived helpers below)
+    return df
+
+# Derived helpers below take the build_df frame itself (_df: underscore -> not hashed) and
+# its load id data_version as the cache key, instead of re-reading build_df. Each cache runs
+# its own TTL clock, so re-reading could mix loads (e.g. a new realtor in the counts table
+# but not in the trend pivot); this way a cached result always belongs to the frame it was
+# computed from, also in fragment reruns that still hold the previous full run's frame.
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_snapshot_timestamps(_df, data_version):
+    """
+    Distinct snapshot timestamps, newest first (list of pd.Timestamp).
+    """
+    src = _df
+    return pd.Index(src['timestamp'].unique()).sort_values(ascending=False).tolist()
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_history_slots(_df, data_version):
+    """
+    Tab2 picker options: {date label: {'HH:MM': timestamp}}, newest date first.
+    Labels are formatted in one vectorized strftime per data refresh, not on every render.
+    A repeated HH:MM within a day maps to its newest snapshot.
+    """
+    ts_idx = pd.DatetimeIndex(get_snapshot_timestamps(_df, data_version)) # newest first
+    slots = {}
+    for day, hhmm, ts in zip(ts_idx.strftime("%Y년 %m월 %d일"), ts_idx.strftime("%H:%M"), ts_idx):
+        slots.setdefault(day, {}).setdefault(hhmm, ts)
+    return slots
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_snapshot_sizes(_df, data_version):
+    """
+    Listing count per snapshot timestamp (trend line source), oldest first.
+    Aggregated once per data refresh instead of on every dashboard render.
+    """
+    return _df.groupby('timestamp').size()
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_snapshot(_df, data_version, ts):
+    """
+    All listings collected at one timestamp.
+    """
+    src = _df
+    # build_df is time-sorted -> the snapshot is one contiguous slice
+    start = src['timestamp'].searchsorted(ts, side='left')
+    end = src['timestamp'].searchsorted(ts, side='right')
+    return src.iloc[start:end]
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_snapshot_diff(_df, data_version, ts, prev_ts):
+    """
+    Article IDs that appeared / disappeared between two snapshots.
+    Returns: (new_ids, deleted_ids) arrays.
+    """
+    # setdiff1d works on the raw arrays (no Python set building / per-id hashing)
+    curr_id_arr = get_snapshot(_df, data_version, ts)['articleNo'].to_numpy()
+    prev_id_arr = get_snapshot(_df, data_version, prev_ts)['articleNo'].to_numpy()
+    return np.setdiff1d(curr_id_arr, prev_id_arr), np.setdiff1d(prev_id_arr, curr_id_arr)
+
+@st.cache_resource(ttl=refresh_interval_sec, show_spinner=False)
+def get_step_changes(_df, data_version):
+    """
+    New / deleted listings for every consecutive snapshot pair in the history (weekly change log).
+    A listing is new at step i if it is in snapshot i but not i-1, deleted if in i-1 but not i.
+    Computed per article with shifts, not with a per-step set diff.
+    Returns: (timestamps, new_events, del_events) - ascending DatetimeIndex and two DataFrames
+             [step, articleNo, realtorName] where step indexes timestamps. Shared objects - do not mutate.
+    """
+    src = _df
+    # One row per (snapshot, article); a repeated articleNo keeps its last row
+    rows = src[['timestamp', 'articleNo', 'realtorName']].drop_duplicates(['timestamp', 'articleNo'], keep='last')
+    timestamps = pd.DatetimeIndex(rows['timestamp'].unique()) # src is time-sorted -> ascending
+    rows = rows.assign(step=timestamps.searchsorted(rows['timestamp']))
+
+    # Snapshot each article was seen in right before / after this one (NaN = none)
+    by_article = rows.sort_values(['articleNo', 'step']).groupby('articleNo', sort=False)['step']
+    prev_step = by_article.shift(1).reindex(rows.index)
+    next_step = by_article.shift(-1).reindex(rows.index)
+
+    # Rows stay in (step, snapshot row) order, the order a per-step scan would visit them
+    new_events = rows[(rows['step'] > 0) & (prev_step != rows['step'] - 1)]
+    del_events = rows[(rows['step'] < len(timestamps) - 1) & (next_step != rows['step'] + 1)]
+    del_events = del_events.assign(step=del_events['step'] + 1) # deleted at the following step
+    cols = ['step', 'articleNo', 'realtorName']
+    return timestamps, new_events[cols], del_events[cols]
+
+@st.cache_data(ttl=refresh_interval_sec, max_entries=64, show_spinner=False)
+def get_lowest_listings(_df, data_version, ts):
+    """
+    Lowest-price listings per dashboard area type for one snapshot.
+    Returns: (lowest_df, full_lowest_df) - first cheapest row per type / every row at its type's min.
+    """
+    snapshot_df = get_snapshot(_df, data_version, ts)
+    # ALL listings at their type's min price: one groupby transform instead of a scan per type
+    in_types = snapshot_df[snapshot_df['type'].isin(TARGET_AREA_TYPES)]
+    full_lowest_df = in_types[in_types['price_int'] == in_types.groupby('type')['price_int'].transform('min')]
+    # Target-type order; stable, so rows keep snapshot order within a type
+    full_lowest_df = full_lowest_df.sort_values('type', key=lambda s: s.map(TARGET_AREA_TYPES.index), kind='stable')
+    
+    # ONE cheapest representative per type for the summary table (first matching row)
+    lowest_df = full_lowest_df.drop_duplicates('type')
+    return lowest_df, full_lowest_df
+
+@st.cache_data(ttl=refresh_interval_sec, max_entries=64, show_spinner=False)
+def get_weekly_activity(_df, data_version, current_ts):
+    """
+    Weekly (7 days up to current_ts) new/deleted listing totals, realtor tallies and change events.
+    Anomalous steps (> 30 new or deleted) are skipped and only reported in debug_logs.
+    Returns: dict with cum_new_count, cum_del_count, realtor_new_counts, realtor_del_counts,
+             change_events, debug_logs, snapshot_count.
+    """
+    seven_days_ago = current_ts - timedelta(days=7)
+    
+    # Step diffs are precomputed on the FULL history (so the window boundary has its prev snapshot)
+    timestamps, new_events, del_events = get_step_changes(_df, data_version)
+    sorted_ts = timestamps[:timestamps.searchsorted(current_ts, side='right')]
+    
+    # Steps inside the window: after seven_days_ago, up to current_ts (step 0 has no prev)
+    steps = pd.RangeIndex(max(timestamps.searchsorted(seven_days_ago, side='right'), 1), len(sorted_ts))
+    new_counts = new_events['step'].value_counts().reindex(steps, fill_value=0)
+    del_counts = del_events['step'].value_counts().reindex(steps, fill_value=0)
+    
+    changed = (new_counts > 0) | (del_counts > 0)
+    # Anomaly Filter (User Request): Skip if change > 30 (likely refresh/glitch)
+    anomaly = (new_counts > 30) | (del_counts > 30)
+    valid_steps = steps[(changed & ~anomaly).to_numpy()]
+    
+    cum_new_count = int(new_counts[valid_steps].sum())
+    cum_del_count = int(del_counts[valid_steps].sum())
+    
+    new_in_window = new_events[new_events['step'].isin(valid_steps)]
+    del_in_window = del_events[del_events['step'].isin(valid_steps)]
+    # Object values + sort=False -> first-seen order, as the former per-step dict increments
+    realtor_new_counts = pd.Series(new_in_window['realtorName'].to_numpy(dtype=object)).value_counts(sort=False, dropna=False).to_dict()
+    realtor_del_counts = pd.Series(del_in_window['realtorName'].to_numpy(dtype=object)).value_counts(sort=False, dropna=False).to_dict()
+    
+    new_ids_by_step = new_in_window.groupby('step')['articleNo'].agg(list)
+    del_ids_by_step = del_in_window.groupby('step')['articleNo'].agg(list)
+    
+    change_events = []
+    debug_logs = [] # Gather debug info
+    
+    # One iteration per changed step (not per article)
+    for step in steps[changed.to_numpy()]:
+        curr_ts = timestamps[step]
+        n_cnt = int(new_counts[step])
+        d_cnt = int(del_counts[step])
+        
+        if anomaly[step]:
+            debug_logs.append(f"[{curr_ts}] Skipped Anomaly (New: {n_cnt}, Del: {d_cnt})")
+        else:
+            change_events.append({
+                "timestamp": curr_ts,
+                "prev_timestamp": timestamps[step - 1],
+                "new_count": n_cnt,
+                "del_count": d_cnt,
+                "new_ids": new_ids_by_step.get(step, []),
+                "del_ids": del_ids_by_step.get(step, []),
+                "display_ts": curr_ts.strftime("%m월 %d일 %H:%M")
+            })
+            
+            # Debug Log
+            debug_logs.append(f"[{curr_ts}] New: {n_cnt}, Del: {d_cnt}")
+
+    return {
+        "cum_new_count": cum_new_count,
+        "cum_del_count": cum_del_count,
+        "realtor_new_counts": realtor_new_counts,
+        "realtor_del_counts": realtor_del_counts,
+        "change_events": change_events,
+        "debug_logs": debug_logs,
+        "snapshot_count": len(sorted_ts),
+    }
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_snapshot_counts(_df, data_version, ts):
+    """
+    Realtor / building listing counts for one snapshot (tab3 tables).
+    Keyed on (data_version, ts) so row selections elsewhere don't recount.
+    Returns: (realtor_counts, b_counts) DataFrames sorted by count desc.
+    """
+    snap = get_snapshot(_df, data_version, ts)
+
+    def count_by(col):
+        # observed=True: count only the categories present in this snapshot (value_counts would
+        # list every unused category with 0). sort=False + stable sort: ties keep first-seen order,
+        # as value_counts on the raw text did (the realtor table is cut at head(20))
+        counts = snap.groupby(col, observed=True, sort=False).size().sort_values(ascending=False, kind='stable')
+        return counts.reset_index(name='count')
+
+    return count_by('realtorName'), count_by('buildingName')
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_detail_table(_df, data_version, ts, limit=500):
+    """
+    Rows for the tab3 all-listings table: most expensive first, capped at `limit`.
+    timestamp (constant within a snapshot), price_int (= price_eok) and the derived
+    type are left out, so st.dataframe serializes fewer columns on every rerun.
+    """
+    snap = get_snapshot(_df, data_version, ts)
+    # Partial sort; price_int orders numerically (tradePrice is '억' text)
+    top = snap.nlargest(limit, "price_int")
+    display_cols = [c for c in top.columns if c not in ("timestamp", "price_int", "type")]
+    return top[display_cols]
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_entity_trends(_df, data_version, col):
+    """
+    Listing count per (timestamp, col) over the full history.
+    One groupby serves every drill-down selection for that column.
+    Returns: DataFrame indexed by timestamp, one column per realtor/building (0 = absent).
+    """
+    src = _df
+    return src.groupby(['timestamp', col], observed=True).size().unstack(fill_value=0)
+
+# Figures are only handed to st.plotly_chart (never modified) -> cache_resource shares
+# one object instead of unpickling a fresh copy on every rerun
+@st.cache_resource(ttl=refresh_interval_sec, max_entries=64, show_spinner=False)
+def get_trend_fig(_df, data_version, current_ts):
+    """
+    Listing-count trend figure (last 50 snapshots up to current_ts).
+    Built once per (data_version, current_ts) instead of on every rerun.
+    Bounded: browsing tab2 history adds one entry per visited snapshot.
+    Shared object - do not mutate.
+    """
+    ts_sizes = get_snapshot_sizes(_df, data_version)
+    # Index is already datetime64 and ascending (groupby sort) -> no re-parse / re-sort
+    trend_agg = ts_sizes[ts_sizes.index <= current_ts].tail(50).reset_index(name='count') # Show more history as we have it now
+    trend_agg['xaxis_label'] = trend_agg['timestamp'].dt.strftime("%m/%d %H:%M")
+    
+    fig_line = px.line(trend_agg, x='xaxis_label', y='count', markers=True, 
+                       labels={"xaxis_label": "일시", "count": "매물 수"})
+    if not trend_agg.empty:
+         y_min = max(0, trend_agg['count'].min() - 5)
+         y_max = trend_agg['count'].max() + 5
+         fig_line.update_yaxes(tickformat="d", dtick=1, range=[y_min, y_max])
+    return fig_line
+
+def downsample_trend(trend, max_points=500):
+    """
+    Caps a (timestamp, count) frame at ~max_points rows for plotting.
+    Keeps the first, last, min and max row of each bucket (M4), so spikes, dips and
+    the segments joining buckets keep their true endpoints.
+    Args:
+        trend (DataFrame): Rows in time order, default RangeIndex, 'count' column.
+    """
+    if len(trend) <= max_points:
+        return trend
+    bucket = np.arange(len(trend)) * (max_points // 4) // len(trend)
+    by_bucket = trend['count'].groupby(bucket)
+    rows_by_bucket = trend.index.to_series().groupby(bucket)
+    keep = np.unique(np.concatenate([
+        rows_by_bucket.first().to_numpy(), rows_by_bucket.last().to_numpy(),
+        by_bucket.idxmin().to_numpy(), by_bucket.idxmax().to_numpy(),
+    ]))
+    return trend.loc[keep]
+
+@st.cache_resource(ttl=refresh_interval_sec, max_entries=64, show_spinner=False)
+def get_entity_trend_fig(_df, data_version, col, name):
+    """
+    Full-history listing-count figure for one realtor/building (tab3 drill-down).
+    Keyed on the selected name, so re-selecting a row reuses the figure.
+    Shared object - do not mutate.
+    """
+    # reindex, not [name]: a name missing from the pivot plots as an empty line instead of raising
+    trend = get_entity_trends(_df, data_version, col).reindex(columns=[name], fill_value=0)[name]
+    trend = downsample_trend(trend[trend > 0].reset_index(name='count'))
+    # Full history (one point per snapshot) -> WebGL instead of per-point SVG
+    return px.line(trend, x='timestamp', y='count', markers=True, title="매물 등록 추이", render_mode="webgl")
+
+@st.cache_data(ttl=refresh_interval_sec, show_spinner=False)
+def get_csv_bytes(_df, data_version):
+    """
+    CSV export bytes for the download button (built once per data refresh, not every rerun).
+    Serialized with pyarrow's multi-threaded CSV writer; UTF-8 BOM kept for Excel.
+    """
+    # 'type' is derived in build_df (not a stored column) -> not exported
+    table = pa.Table.from_pandas(_df.drop(columns='type'), preserve_index=False)
+    # Whole seconds -> '2025-12-15 00:40:00' (same text as the stored timestamps)
+    ts_idx = table.schema.get_field_index('timestamp')
+    table = table.set_column(ts_idx, 'timestamp', table.column('timestamp').cast(pa.timestamp('s'), safe=False))
+
+    buf = io.BytesIO()
+    pa_csv.write_csv(table, buf)
+    return b'\xef\xbb\xbf' + buf.getvalue()
 
 
 # --- Sidebar: Lazy Loading Complex Selection ---
@@ -93,60 +483,85 @@ if not selected_complex:
     st.stop()
 
 # 2. Load Data (Access Deep History for Selection)
-with st.spinner(f"'{', '.join(selected_complex)}' 데이터 로딩 중 (최대 100,000건)..."):
-    data = load_data(target_complexes=selected_complex)
+try:
+    with st.spinner(f"'{', '.join(selected_complex)}' 데이터 로딩 중 (최대 100,000건)..."):
+        df = build_df(tuple(selected_complex))
+except Exception as e:
+    st.error(f"❌ 데이터를 불러오지 못했습니다. 잠시 후 다시 시도해주세요. ({e})")
+    st.stop()
 
-if not data:
+if df.empty:
+    # Don't keep serving an empty load from the shared cache -> the next rerun queries again
+    build_df.clear(tuple(selected_complex))
     st.warning("선택한 단지의 데이터가 없습니다.")
     st.stop()
 
-df = pd.DataFrame(data)
+# Apply Filter (Standard DataFrame Filter)
+# Note: specific table (listings_{id}) is already queried, so strict filtering by atclNm is risky for migrated data.
+# We bypass the name check to ensure all rows in the table are shown.
+filtered_df = df 
+data_version = df.attrs['data_version'] # Cache key of every derived helper below
+unique_timestamps = get_snapshot_timestamps(df, data_version)
 
-# --- Data Cleaning (User Request) ---
-# Exclude anomaly: DMC View Xi (108064) @ 2025-12-14 23:40
-if not df.empty and 'timestamp' in df.columns and 'atclNm' in df.columns:
-    # Filter specific timestamps for DMC Park View Xi (User Requests: 2025-12-14 23:40, 2025-12-15 00:40)
-    anomalies = ['2025-12-14T23:40', '2025-12-15T00:40']
-    
-    # Construct mask (atclNm == DMC AND timestamp matches any anomaly)
-    mask_dmc = (df['atclNm'] == 'DMC파크뷰자이')
-    mask_ts = df['timestamp'].str.contains('|'.join(anomalies), na=False)
-    
-    anomaly_mask = mask_dmc & mask_ts
-    
-    if anomaly_mask.any():
-        df = df[~anomaly_mask]
 
-# Ensure columns
-for col in ["buildingName", "realtorName", "direction"]:
-    if col not in df.columns:
-        df[col] = "정보없음"
+# --- Helper: Change Log Fragment ---
+@st.fragment
+def render_change_log(change_events, history_up_to_now, key_suffix=""):
+    """
+    Weekly change-log table + selected event details (new / deleted listings).
+    """
+    if change_events:
+        log_df = pd.DataFrame(change_events)
+        log_disp_df = log_df[['display_ts', 'new_count', 'del_count']].copy()
+        log_disp_df.columns = ['일시', '신규 등록 (건)', '삭제 (건)']
+        # Show Newest First
+        log_disp_df = log_disp_df.iloc[::-1].reset_index(drop=True)
+
+        sel_c_log = st.dataframe(
+            log_disp_df, 
+            width="stretch", 
+            on_select="rerun", 
+            selection_mode="single-row",
+            key=f"tbl_change_log_{key_suffix}"
+            )
 
-# Type enforcement for robust set operations
-if 'articleNo' in df.columns:
-    df['articleNo'] = df['articleNo'].astype(str)
+        if sel_c_log.selection.rows:
+            sel_row_idx = sel_c_log.selection.rows[0]
+            # Map back to original log_df (log_df is ascending, display is descending)
+            actual_idx = len(change_events) - 1 - sel_row_idx
+            selected_event = change_events[actual_idx]
 
-df['price_eok'] = df['price_int'] / 100000000
+            sel_ts_str = selected_event['display_ts']
 
-# Apply Filter (Standard DataFrame Filter)
-# Note: specific table (listings_{id}) is already queried, so strict filtering by atclNm is risky for migrated data.
-# We bypass the name check to ensure all rows in the table are shown.
-filtered_df = df 
-unique_timestamps = sorted(filtered_df['timestamp'].unique(), reverse=True)
+            st.divider()
+            st.markdown(f"#### 🔍 {sel_ts_str} 상세 변동 내역")
 
+            # --- New Details ---
+            if selected_event['new_ids']:
+                st.markdown(f"**🔹 신규 등록 ({selected_event['new_count']}건)**")
+                e_ts = selected_event['timestamp']
+                e_snapshot = history_up_to_now[history_up_to_now['timestamp'] == e_ts]
+                e_new = e_snapshot[e_snapshot['articleNo'].isin(selected_event['new_ids'])]
 
-# --- Helper: Area Type Classifier ---
-def get_area_type(size):
-    try:
-        s = float(size)
-        if 50 <= s < 70: return '59'
-        elif 70 <= s < 100: return '84'
-        elif 100 <= s < 135: return '120'
-        elif 135 <= s < 165: return '152'
-        elif 165 <= s < 200: return '175'
-        else: return '기타'
-    except:
-        return '기타'
+                disp_cols = ['spc2', 'tradePrice', 'floorInfo', 'direction', 'buildingName', 'realtorName']
+                start_disp = e_new[disp_cols].copy()
+                start_disp.columns = ['면적', '가격', '층수', '향', '동', '중개사']
+                st.dataframe(start_disp, hide_index=True)
+
+            # --- Deleted Details ---
+            if selected_event['del_ids']:
+                st.markdown(f"**🔻 삭제됨 ({selected_event['del_count']}건)**")
+                p_ts = selected_event['prev_timestamp']
+                p_snapshot = history_up_to_now[history_up_to_now['timestamp'] == p_ts]
+                e_del = p_snapshot[p_snapshot['articleNo'].isin(selected_event['del_ids'])]
+
+                disp_cols = ['spc2', 'tradePrice', 'floorInfo', 'direction', 'buildingName', 'realtorName']
+                del_disp = e_del[disp_cols].copy()
+                del_disp.columns = ['면적', '가격', '층수', '향', '동', '중개사']
+                st.dataframe(del_disp, hide_index=True)
+
+    else:
+        st.info("변동 이력이 없습니다.")
 
 # --- Helper: Render Dashboard ---
 def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
@@ -157,11 +572,13 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
         st.error("데이터가 없습니다.")
         return
 
-    ts_display = pd.to_datetime(current_ts).strftime("%Y년 %m월 %d일 %H:%M")
+    data_version = view_df.attrs['data_version']
     
-    # Snapshot at current_ts
-    snapshot_df = view_df[view_df['timestamp'] == current_ts].copy()
-    snapshot_df['type'] = snapshot_df['spc2'].apply(get_area_type)
+    # current_ts is already a pd.Timestamp (parsed once in build_df)
+    ts_display = current_ts.strftime("%Y년 %m월 %d일 %H:%M")
+    
+    # Snapshot at current_ts (cached per timestamp; a fresh copy on every call)
+    snapshot_df = get_snapshot(view_df, data_version, current_ts)
     
     # Previous Snapshot Logic (Net Increase Metric)
     count_diff = 0
@@ -172,14 +589,12 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
         prev_idx = curr_idx + 1
         if prev_idx < len(all_timestamps):
             prev_ts = all_timestamps[prev_idx]
-            prev_snapshot_df = view_df[view_df['timestamp'] == prev_ts].copy()
-            prev_snapshot_df['type'] = prev_snapshot_df['spc2'].apply(get_area_type)
+            prev_snapshot_df = get_snapshot(view_df, data_version, prev_ts)
             
             count_diff = len(snapshot_df) - len(prev_snapshot_df)
             
-            # New/Deleted Sets for Real-Time Metric (Current Pulse)
-            new_ids = set(snapshot_df['articleNo']) - set(prev_snapshot_df['articleNo'])
-            deleted_ids = set(prev_snapshot_df['articleNo']) - set(snapshot_df['articleNo'])
+            # New/Deleted IDs for Real-Time Metric (Current Pulse)
+            new_ids, deleted_ids = get_snapshot_diff(view_df, data_version, current_ts, prev_ts)
         else:
             new_ids = set()
             deleted_ids = set()
@@ -202,24 +617,19 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
 
     # --- 2. Type-based Metrics (59, 84, 120, 152, 175) ---
     st.markdown("### 📐 타입별 현황 (59, 84, 120, 152, 175)")
-    target_types = ['59', '84', '120', '152', '175']
-    
-    # Calculate metrics per type
-    type_metrics = []
-    for t in target_types:
-        # Current
-        curr_t = snapshot_df[snapshot_df['type'] == t]
-        c_cnt = len(curr_t)
-        c_avg = curr_t['price_int'].mean() if not curr_t.empty else 0
-        
-        # Prev
-        p_cnt = 0
-        if not prev_snapshot_df.empty:
-            prev_t = prev_snapshot_df[prev_snapshot_df['type'] == t]
-            p_cnt = len(prev_t)
-        
-        diff = c_cnt - p_cnt
-        type_metrics.append((t, c_cnt, c_avg, diff))
+    target_types = TARGET_AREA_TYPES
+    
+    # Calculate metrics per type (one groupby per snapshot instead of a mask per type)
+    curr_by_type = snapshot_df.groupby('type')['price_int'].agg(['size', 'mean']).reindex(target_types)
+    c_cnts = curr_by_type['size'].fillna(0).astype(int)
+    c_avgs = curr_by_type['mean'].fillna(0)
+    
+    p_cnts = 0
+    if not prev_snapshot_df.empty:
+        p_cnts = prev_snapshot_df.groupby('type').size().reindex(target_types, fill_value=0)
+    
+    diffs = c_cnts - p_cnts
+    type_metrics = list(zip(target_types, c_cnts, c_avgs, diffs))
     
     # Display Type Metrics in Columns
     cols = st.columns(len(target_types))
@@ -235,18 +645,7 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
     # --- 3. Trend Chart (Generic) ---
     st.subheader(f"📈 매물 수집 증감 추이 (~{ts_display})")
     
-    trend_view_df = view_df[view_df['timestamp'] <= current_ts]
-    trend_agg = trend_view_df.groupby('timestamp').size().reset_index(name='count')
-    trend_agg['timestamp_dt'] = pd.to_datetime(trend_agg['timestamp'], format='mixed', errors='coerce', utc=True)
-    trend_agg = trend_agg.sort_values('timestamp_dt').tail(50) # Show more history as we have it now
-    trend_agg['xaxis_label'] = trend_agg['timestamp_dt'].dt.strftime("%m/%d %H:%M")
-    
-    fig_line = px.line(trend_agg, x='xaxis_label', y='count', markers=True, 
-                       labels={"xaxis_label": "일시", "count": "매물 수"})
-    if not trend_agg.empty:
-         y_min = max(0, trend_agg['count'].min() - 5)
-         y_max = trend_agg['count'].max() + 5
-         fig_line.update_yaxes(tickformat="d", dtick=1, range=[y_min, y_max])
+    fig_line = get_trend_fig(view_df, data_version, current_ts)
     
     # use_container_width is standard for Plotly charts in Streamlit
     st.plotly_chart(fig_line, width="stretch", key=f"chart_trend_{key_suffix}")
@@ -257,22 +656,9 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
     st.subheader("📉 전용면적별 최저가 매물")
     
     if not snapshot_df.empty:
-        # Group by Type and Find Min Price
-        # We want to ensure we cover the target types if they exist
-        lowest_list = []
-        
-        for t in target_types:
-            type_df = snapshot_df[snapshot_df['type'] == t]
-            if not type_df.empty:
-                min_price = type_df['price_int'].min()
-                # Get the row(s) with min price. For the summary table, take the first one or distinct ones.
-                # User asked to group by these types.
-                # Let's show the ONE cheapest representative for the summary table
-                cheapest_rep = type_df[type_df['price_int'] == min_price].iloc[0]
-                lowest_list.append(cheapest_rep)
+        lowest_df, full_lowest_df = get_lowest_listings(view_df, data_version, current_ts)
         
-        if lowest_list:
-            lowest_df = pd.DataFrame(lowest_list)
+        if not lowest_df.empty:
             # Columns: 전용면적/가격/동/층수/향/중개사
             # 'spc2' is used for display as per user existing code
             disp_cols = ['spc2', 'tradePrice', 'buildingName', 'floorInfo', 'direction', 'realtorName']
@@ -283,18 +669,7 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
             
         # --- 5. All Lowest Price Listings ---
         st.markdown("#### 🏘️ 전용면적별 최저가 매물 부동산 전체")
-        # Find ALL listings that match the min price for their type
-        all_lowest_rows = []
-        for t in target_types:
-            type_df = snapshot_df[snapshot_df['type'] == t]
-            if not type_df.empty:
-                min_price = type_df['price_int'].min()
-                matches = type_df[type_df['price_int'] == min_price].copy()
-                matches['type'] = t
-                all_lowest_rows.append(matches)
-        
-        if all_lowest_rows:
-            full_lowest_df = pd.concat(all_lowest_rows)
+        if not full_lowest_df.empty:
             disp_cols = ['spc2', 'tradePrice', 'buildingName', 'floorInfo', 'direction', 'realtorName', 'type']
             f_lowest = full_lowest_df[disp_cols].copy()
             f_lowest = f_lowest.sort_values(['type', 'tradePrice'])
@@ -303,7 +678,7 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
             
             # --- 6. Top 5 Realtors (Lowest Price Count) ---
             st.markdown("#### 🏆 최저가 매물 최다 등록 부동산 (Top 5)")
-            top_lp_realtors = full_lowest_df['realtorName'].value_counts().head(5).reset_index()
+            top_lp_realtors = full_lowest_df['realtorName'].value_counts()[lambda c: c > 0].head(5).reset_index()
             top_lp_realtors.columns = ['부동산', '최저가 매물 수']
             st.dataframe(top_lp_realtors, hide_index=True, width="stretch")
 
@@ -316,84 +691,19 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
     # 1. Scope: Full History UP TO Current (to ensure we have prev for comparison)
     # But we want to 'Accumulate' only 7 days events.
     
-    current_dt = pd.to_datetime(current_ts)
-    seven_days_ago = current_dt - timedelta(days=7)
-    
-    history_up_to_now = view_df[view_df['timestamp'] <= current_ts].copy()
-    
-    # 2. Sequential Processing on FULL history allows computing diffs at the boundary
-    sorted_ts = sorted(history_up_to_now['timestamp'].unique())
-    
-    cum_new_count = 0
-    cum_del_count = 0
-    realtor_new_counts = {}
-    realtor_del_counts = {}
-    change_events = []
+    seven_days_ago = current_ts - timedelta(days=7)
     
-    debug_logs = [] # Gather debug info
+    # view_df is time-sorted (build_df) -> binary search instead of a full mask
+    history_up_to_now = view_df.iloc[:view_df['timestamp'].searchsorted(current_ts, side='right')]
     
-    if len(sorted_ts) > 1:
-        # Group all data
-        grouped = history_up_to_now.groupby('timestamp')
-        ts_data_map = {}
-        for ts, group in grouped:
-            ts_data_map[ts] = dict(zip(group['articleNo'], group['realtorName']))
-            
-        prev_ts = sorted_ts[0]
-        prev_items = ts_data_map[prev_ts]
-        
-        for i in range(1, len(sorted_ts)):
-            curr_ts = sorted_ts[i]
-            curr_dt = pd.to_datetime(curr_ts)
-            
-            curr_items = ts_data_map[curr_ts]
-            
-            # Check Filtering Condition: Is this event within Last 7 Days?
-            if curr_dt > seven_days_ago:
-                prev_ids = set(prev_items.keys())
-                curr_ids = set(curr_items.keys())
-                
-                new_in_step = curr_ids - prev_ids
-                del_in_step = prev_ids - curr_ids
-                
-                if new_in_step or del_in_step:
-                    n_cnt = len(new_in_step)
-                    d_cnt = len(del_in_step)
-                    
-                    # Anomaly Filter (User Request): Skip if change > 30 (likely refresh/glitch)
-                    if n_cnt > 30 or d_cnt > 30:
-                        debug_logs.append(f"[{curr_ts}] Skipped Anomaly (New: {n_cnt}, Del: {d_cnt})")
-                    else:
-                        cum_new_count += n_cnt
-                        cum_del_count += d_cnt
-                        
-                        change_events.append({
-                            "timestamp": curr_ts,
-                            "prev_timestamp": prev_ts,
-                            "new_count": n_cnt,
-                            "del_count": d_cnt,
-                            "new_ids": list(new_in_step),
-                            "del_ids": list(del_in_step),
-                            "display_ts": curr_dt.strftime("%m월 %d일 %H:%M")
-                        })
-                        
-                        # Debug Log
-                        debug_logs.append(f"[{curr_ts}] New: {n_cnt}, Del: {d_cnt}")
-                        
-                        for nid in new_in_step:
-                            r_name = curr_items.get(nid, "알수없음")
-                            realtor_new_counts[r_name] = realtor_new_counts.get(r_name, 0) + 1
-                        
-                        for did in del_in_step:
-                            r_name = prev_items.get(did, "알수없음")
-                            realtor_del_counts[r_name] = realtor_del_counts.get(r_name, 0) + 1
-            else:
-                pass 
-                # debug_logs.append(f"[{curr_ts}] Skipped (Old: < {seven_days_ago})")
-
-            # Update prev for next iteration
-            prev_ts = curr_ts
-            prev_items = curr_items
+    # 2. Step diffs / window totals (cached per (data_version, current_ts))
+    weekly = get_weekly_activity(view_df, data_version, current_ts)
+    cum_new_count = weekly["cum_new_count"]
+    cum_del_count = weekly["cum_del_count"]
+    realtor_new_counts = weekly["realtor_new_counts"]
+    realtor_del_counts = weekly["realtor_del_counts"]
+    change_events = weekly["change_events"]
+    debug_logs = weekly["debug_logs"]
 
     # --- Summary Counts ---
     wc_total1, wc_total2 = st.columns(2)
@@ -429,64 +739,14 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
     st.subheader("📜 주간 변동 상세 로그")
     st.caption("변동(추가/삭제)이 발생한 시점을 클릭하면 상세 내용을 볼 수 있습니다.")
 
-    if change_events:
-        log_df = pd.DataFrame(change_events)
-        log_disp_df = log_df[['display_ts', 'new_count', 'del_count']].copy()
-        log_disp_df.columns = ['일시', '신규 등록 (건)', '삭제 (건)']
-        # Show Newest First
-        log_disp_df = log_disp_df.iloc[::-1].reset_index(drop=True)
-        
-        sel_c_log = st.dataframe(
-            log_disp_df, 
-            width="stretch", 
-            on_select="rerun", 
-            selection_mode="single-row",
-            key=f"tbl_change_log_{key_suffix}"
-            )
-        
-        if sel_c_log.selection.rows:
-            sel_row_idx = sel_c_log.selection.rows[0]
-            # Map back to original log_df (log_df is ascending, display is descending)
-            actual_idx = len(change_events) - 1 - sel_row_idx
-            selected_event = change_events[actual_idx]
-            
-            sel_ts_str = selected_event['display_ts']
-            
-            st.divider()
-            st.markdown(f"#### 🔍 {sel_ts_str} 상세 변동 내역")
-            
-            # --- New Details ---
-            if selected_event['new_ids']:
-                st.markdown(f"**🔹 신규 등록 ({selected_event['new_count']}건)**")
-                e_ts = selected_event['timestamp']
-                e_snapshot = history_up_to_now[history_up_to_now['timestamp'] == e_ts]
-                e_new = e_snapshot[e_snapshot['articleNo'].isin(selected_event['new_ids'])]
-                
-                disp_cols = ['spc2', 'tradePrice', 'floorInfo', 'direction', 'buildingName', 'realtorName']
-                start_disp = e_new[disp_cols].copy()
-                start_disp.columns = ['면적', '가격', '층수', '향', '동', '중개사']
-                st.dataframe(start_disp, hide_index=True)
-            
-            # --- Deleted Details ---
-            if selected_event['del_ids']:
-                st.markdown(f"**🔻 삭제됨 ({selected_event['del_count']}건)**")
-                p_ts = selected_event['prev_timestamp']
-                p_snapshot = history_up_to_now[history_up_to_now['timestamp'] == p_ts]
-                e_del = p_snapshot[p_snapshot['articleNo'].isin(selected_event['del_ids'])]
-                
-                disp_cols = ['spc2', 'tradePrice', 'floorInfo', 'direction', 'buildingName', 'realtorName']
-                del_disp = e_del[disp_cols].copy()
-                del_disp.columns = ['면적', '가격', '층수', '향', '동', '중개사']
-                st.dataframe(del_disp, hide_index=True)
-
-    else:
-        st.info("변동 이력이 없습니다.")
+    # Row selection only reruns this fragment, not the whole dashboard
+    render_change_log(change_events, history_up_to_now, key_suffix)
     
     # --- DEBUG SECTION ---
     with st.expander("🛠️ 디버그 정보 (개발용)", expanded=False):
         st.write(f"**Current TS**: {current_ts}")
         st.write(f"**7 Days Ago Ref**: {seven_days_ago}")
-        st.write(f"**Snapshot Count**: {len(sorted_ts)}")
+        st.write(f"**Snapshot Count**: {weekly['snapshot_count']}")
         st.write(f"**ArticleNo Type**: {df['articleNo'].dtype}")
         
         if debug_logs:
@@ -496,162 +756,146 @@ def render_dashboard_view(view_df, current_ts, all_timestamps, key_suffix=""):
             st.write("No events detected in loop.")
 
 
+# --- Helper: Drill-down Fragments (Tab 3) ---
+# Row selection (on_select="rerun") only reruns the fragment, not the whole dashboard
+# Fragment reruns reuse their args, so the groupby index passed in is built once per full run
+@st.fragment
+def render_realtor_detail(latest_by_realtor, realtor_counts, view_df, data_version):
+    sel_r = st.dataframe(realtor_counts.head(20), width="stretch", on_select="rerun", selection_mode="single-row", key="tbl_realtor")
+    
+    if sel_r.selection.rows:
+        s_idx = sel_r.selection.rows[0]
+        s_real = realtor_counts.iloc[s_idx]['realtorName']
+        
+        st.divider()
+        st.markdown(f"#### '{s_real}' 상세")
+        
+        fig_r = get_entity_trend_fig(view_df, data_version, 'realtorName', s_real)
+        st.plotly_chart(fig_r, width="stretch", key="chart_realtor_trend")
+        
+        st.dataframe(latest_by_realtor.get_group(s_real), width="stretch", hide_index=True, key="tbl_realtor_detail")
+
+@st.fragment
+def render_building_detail(latest_by_building, b_counts, view_df, data_version):
+    sel_b = st.dataframe(b_counts, width="stretch", on_select="rerun", selection_mode="single-row", key="tbl_building")
+    
+    if sel_b.selection.rows:
+        s_idx_b = sel_b.selection.rows[0]
+        s_build = b_counts.iloc[s_idx_b]['buildingName']
+        
+        st.divider()
+        st.markdown(f"#### '{s_build}' 상세")
+        
+        fig_b = get_entity_trend_fig(view_df, data_version, 'buildingName', s_build)
+        st.plotly_chart(fig_b, width="stretch", key="chart_building_trend")
+        
+        st.dataframe(latest_by_building.get_group(s_build), width="stretch", hide_index=True, key="tbl_building_detail")
+
+
 # --- Main Layout with Tabs ---
-tab1, tab2, tab3 = st.tabs(["📈 최신 현황", "🕰️ 히스토리", "🔎 매물 상세 분석"])
+# Stateful tabs: only the open tab's body runs on a rerun (switching tabs triggers one)
+tab1, tab2, tab3 = st.tabs(["📈 최신 현황", "🕰️ 히스토리", "🔎 매물 상세 분석"], key="main_tab", on_change="rerun")
 
 with tab1:
-    if unique_timestamps:
-        latest_ts = unique_timestamps[0]
-        render_dashboard_view(filtered_df, latest_ts, unique_timestamps, key_suffix="latest")
-    else:
-        st.warning("데이터가 없습니다.")
+    if tab1.open:
+        if unique_timestamps:
+            latest_ts = unique_timestamps[0]
+            render_dashboard_view(filtered_df, latest_ts, unique_timestamps, key_suffix="latest")
+        else:
+            st.warning("데이터가 없습니다.")
 
 with tab2:
-    st.info("과거 시점의 데이터를 조회합니다.")
+    if tab2.open:
+        st.info("과거 시점의 데이터를 조회합니다.")
     
-    if unique_timestamps:
-        # Hierarchical Selection: Date -> Time
+        if unique_timestamps:
+            # Hierarchical Selection: Date -> Time
         
-        # 1. Parse Dates safely (Robust Logic)
-        ts_idx = pd.to_datetime(unique_timestamps, format='mixed', errors='coerce', utc=True)
-        # Convert to Naive (strip timezone) for display consistency
-        ts_idx = ts_idx.tz_localize(None)
+            # 1. Date / time labels are formatted once per data refresh (cached)
+            history_slots = get_history_slots(df, data_version)
+            date_set = list(history_slots)
         
-        # Zip with original strings to keep mapping and filter NaT
-        valid_pairs = []
-        for orig, dt in zip(unique_timestamps, ts_idx):
-             if pd.notna(dt):
-                 valid_pairs.append((orig, dt))
-        
-        if not valid_pairs:
-             st.error("유효한 날짜 데이터가 없습니다.")
-        else:
-             # Extract Dates
-             date_set = sorted(list(set([p[1].strftime("%Y년 %m월 %d일") for p in valid_pairs])), reverse=True)
-             
-             c_h1, c_h2 = st.columns(2)
-             with c_h1:
+            c_h1, c_h2 = st.columns(2)
+            with c_h1:
                 sel_date_str = st.selectbox("📅 날짜 선택 (년-월-일)", date_set, key="hist_date_sel")
-             
-             if sel_date_str:
-                 # Filter by date
-                 filtered_pairs = [p for p in valid_pairs if p[1].strftime("%Y년 %m월 %d일") == sel_date_str]
-                 # Sort by time Descending
-                 filtered_pairs.sort(key=lambda x: x[1], reverse=True)
-                 
-                 filtered_ts_strs = [p[0] for p in filtered_pairs]
-                 
-                 with c_h2:
-                     # Fixed 20-min slots for 24 hours
-                     fixed_slots = []
-                     for h in range(24):
-                         for m in [0, 20, 40]:
-                             fixed_slots.append(f"{h:02d}:{m:02d}")
-                             
-                     # Identify available times
-                     available_times = set([p[1].strftime("%H:%M") for p in filtered_pairs])
-                     
-                     def format_slot(slot):
-                         if slot in available_times:
-                             return f"🔴 {slot} (데이터 있음)"
-                         else:
-                             return f"⚪ {slot} (수집 안됨)"
-
-                     sel_time_slot = st.selectbox("⏰ 시간 선택 (수집 주기)", fixed_slots, format_func=format_slot)
-                 
-                 if sel_time_slot:
-                      # Find matching data
-                      matched_ts = None
-                      # Prefer exact match? or just first that matches HH:MM
-                      for p in filtered_pairs:
-                          if p[1].strftime("%H:%M") == sel_time_slot:
-                              matched_ts = p[0]
-                              break
-                      
-                      if matched_ts:
-                          st.divider()
-                          render_dashboard_view(filtered_df, matched_ts, unique_timestamps, key_suffix="history")
-                      else:
-                          st.info(f"선택하신 시간({sel_time_slot})에 수집된 데이터가 없습니다.")
         
-        with st.expander("🐞 데이터 기간 진단"):
-            st.write(f"총 스냅샷 수: {len(unique_timestamps)}")
-            if valid_pairs:
-                min_dt = min([p[1] for p in valid_pairs])
-                max_dt = max([p[1] for p in valid_pairs])
-                st.write(f"데이터 범위: {min_dt} ~ {max_dt}")
+            if sel_date_str:
+                # Available times of the selected date -> snapshot timestamp
+                available_times = history_slots[sel_date_str]
+            
+                with c_h2:
+                    # Fixed 20-min slots for 24 hours
+                    fixed_slots = []
+                    for h in range(24):
+                        for m in [0, 20, 40]:
+                            fixed_slots.append(f"{h:02d}:{m:02d}")
                 
-            st.write(f"원본 타임스탬프 샘플(Top 5): {unique_timestamps[:5]}")
-            if len(unique_timestamps) > 5:
-                st.write(f"원본 타임스탬프 샘플(Tail 5): {unique_timestamps[-5:]}")
+                    def format_slot(slot):
+                        if slot in available_times:
+                            return f"🔴 {slot} (데이터 있음)"
+                        else:
+                            return f"⚪ {slot} (수집 안됨)"
 
-            if 'atclNm' in df.columns:
-                 st.write("데이터 내 단지명(atclNm) 분포:")
-                 st.write(df['atclNm'].value_counts())
-    else:
-        st.warning("데이터가 없습니다.")
+                    sel_time_slot = st.selectbox("⏰ 시간 선택 (수집 주기)", fixed_slots, format_func=format_slot)
+            
+                if sel_time_slot:
+                    # Find matching data
+                    matched_ts = available_times.get(sel_time_slot)
+                
+                    if matched_ts:
+                        st.divider()
+                        render_dashboard_view(filtered_df, matched_ts, unique_timestamps, key_suffix="history")
+                    else:
+                        st.info(f"선택하신 시간({sel_time_slot})에 수집된 데이터가 없습니다.")
+        
+            with st.expander("🐞 데이터 기간 진단"):
+                st.write(f"총 스냅샷 수: {len(unique_timestamps)}")
+                # unique_timestamps is newest first
+                st.write(f"데이터 범위: {unique_timestamps[-1]} ~ {unique_timestamps[0]}")
+                
+                st.write(f"원본 타임스탬프 샘플(Top 5): {[str(t) for t in unique_timestamps[:5]]}")
+                if len(unique_timestamps) > 5:
+                    st.write(f"원본 타임스탬프 샘플(Tail 5): {[str(t) for t in unique_timestamps[-5:]]}")
+
+                if 'atclNm' in df.columns:
+                     st.write("데이터 내 단지명(atclNm) 분포:")
+                     st.write(df['atclNm'].value_counts())
+        else:
+            st.warning("데이터가 없습니다.")
 
 with tab3:
-    st.header("🕵️ 상세 분석 (최신 기준)")
-    # Defaults to latest for now
-    if unique_timestamps:
-        latest_ts = unique_timestamps[0]
-        latest_df = filtered_df[filtered_df['timestamp'] == latest_ts].copy()
+    if tab3.open:
+        st.header("🕵️ 상세 분석 (최신 기준)")
+        # Defaults to latest for now
+        if unique_timestamps:
+            latest_ts = unique_timestamps[0]
+            # Drill-down tables show the stored columns only ('type' is derived in build_df)
+            latest_df = get_snapshot(df, data_version, latest_ts).drop(columns='type')
         
-        subtab1, subtab2 = st.tabs(["🏢 부동산(중개사)별", "🏙️ 동(Building)별"])
+            realtor_counts, b_counts = get_snapshot_counts(df, data_version, latest_ts)
         
-        with subtab1:
-            if not latest_df.empty:
-                realtor_counts = latest_df['realtorName'].value_counts().reset_index()
-                realtor_counts.columns = ['realtorName', 'count']
-                
-                sel_r = st.dataframe(realtor_counts.head(20), width="stretch", on_select="rerun", selection_mode="single-row", key="tbl_realtor")
-                
-                if sel_r.selection.rows:
-                    s_idx = sel_r.selection.rows[0]
-                    s_real = realtor_counts.iloc[s_idx]['realtorName']
-                    
-                    st.divider()
-                    st.markdown(f"#### '{s_real}' 상세")
-                    
-                    r_trend = filtered_df[filtered_df['realtorName'] == s_real].groupby('timestamp').size().reset_index(name='count')
-                    r_trend['ts'] = pd.to_datetime(r_trend['timestamp'], format='mixed', errors='coerce', utc=True)
-                    r_trend = r_trend.sort_values('ts')
-                    
-                    fig_r = px.line(r_trend, x='timestamp', y='count', markers=True, title="매물 등록 추이")
-                    st.plotly_chart(fig_r, width="stretch", key="chart_realtor_trend")
-                    
-                    st.dataframe(latest_df[latest_df['realtorName'] == s_real], width="stretch", hide_index=True, key="tbl_realtor_detail")
-
-        with subtab2:
-            if not latest_df.empty:
-                b_counts = latest_df['buildingName'].value_counts().reset_index()
-                b_counts.columns = ['buildingName', 'count']
-                
-                sel_b = st.dataframe(b_counts, width="stretch", on_select="rerun", selection_mode="single-row", key="tbl_building")
-                
-                if sel_b.selection.rows:
-                    s_idx_b = sel_b.selection.rows[0]
-                    s_build = b_counts.iloc[s_idx_b]['buildingName']
-                    
-                    st.divider()
-                    st.markdown(f"#### '{s_build}' 상세")
-                    
-                    b_trend = filtered_df[filtered_df['buildingName'] == s_build].groupby('timestamp').size().reset_index(name='count')
-                    b_trend['ts'] = pd.to_datetime(b_trend['timestamp'], format='mixed', errors='coerce', utc=True)
-                    b_trend = b_trend.sort_values('ts')
-                    
-                    fig_b = px.line(b_trend, x='timestamp', y='count', markers=True, title="매물 등록 추이")
-                    st.plotly_chart(fig_b, width="stretch", key="chart_building_trend")
-                    
-                    st.dataframe(latest_df[latest_df['buildingName'] == s_build], width="stretch", hide_index=True, key="tbl_building_detail")
-    
-    # --- Moved All Data Table Here ---
-    st.markdown("---")
-    st.subheader("📋 전체 매물 데이터 (최신)")
-    if unique_timestamps:
-        st.dataframe(latest_df.sort_values(by="tradePrice", ascending=False), width="stretch", key="tbl_all_details")
+            subtab1, subtab2 = st.tabs(["🏢 부동산(중개사)별", "🏙️ 동(Building)별"], key="detail_tab", on_change="rerun")
+        
+            with subtab1:
+                if subtab1.open:
+                    if not latest_df.empty:
+                        latest_by_realtor = latest_df.groupby('realtorName', observed=True, sort=False)
+                        render_realtor_detail(latest_by_realtor, realtor_counts, df, data_version)
+
+            with subtab2:
+                if subtab2.open:
+                    if not latest_df.empty:
+                        latest_by_building = latest_df.groupby('buildingName', observed=True, sort=False)
+                        render_building_detail(latest_by_building, b_counts, df, data_version)
+    
+        # --- Moved All Data Table Here ---
+        st.markdown("---")
+        st.subheader("📋 전체 매물 데이터 (최신)")
+        if unique_timestamps:
+            st.dataframe(get_detail_table(df, data_version, latest_ts), width="stretch", key="tbl_all_details")
     
-    # Export
-    csv = filtered_df.to_csv(index=False).encode('utf-8-sig')
-    st.download_button("💾 CSV 다운로드", csv, "naver_land_data.csv", "text/csv")
+        # Export
+        # Callable -> the CSV is built (or read from cache) only when the button is clicked,
+        # instead of registering the full file bytes with the page on every rerun
+        # Default args bind this run's frame + load id (not the module globals at click time)
+        st.download_button("💾 CSV 다운로드", lambda src=df, version=data_version: get_csv_bytes(src, version), "naver_land_data.csv", "text/csv")
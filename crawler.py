@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import random
 from utils import get_timestamp_str, clean_price
@@ -15,6 +16,10 @@ class NaverLandCrawler:
             "X-Requested-With": "XMLHttpRequest",
             "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"
         }
+        # Reuse one session so pages/collections share the keep-alive connection pool
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
     def fetch_listings(self, region_code=None, complex_no=None, trade_type="A1"):
         """
@@ -57,7 +62,7 @@ class NaverLandCrawler:
         while True:
             params["page"] = page
             try:
-                response = requests.get(self.base_url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(self.base_url, params=params, timeout=10)
                 response.raise_for_status()
                 data = response.json()
                 
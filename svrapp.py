@@ -7,9 +7,8 @@ import os
 import threading
 from streamlit.runtime.scriptrunner import add_script_run_ctx
 from crawler import NaverLandCrawler
-from utils import load_data, save_data, clear_data
+from utils import load_data, save_data, clear_data, BASE_CSS
 from config import COMPLEX_INFO
-import streamlit.components.v1 as components
 
 # Page Config
 st.set_page_config(
@@ -19,14 +18,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-    <style>
-    .stApp { opacity: 1 !important; }
-    [data-testid="stAppViewContainer"] { opacity: 1 !important; }
-    [data-testid="stSidebar"] { opacity: 1 !important; }
-    header[data-testid="stHeader"] { opacity: 1 !important; }
-    </style>
-""", unsafe_allow_html=True)
+st.html(f"<style>{BASE_CSS}</style>")
 
 st.title("🤖 [Server] 부동산 데이터 수집 서버")
 st.markdown("백그라운드 스레드 기반 자동 수집 스케줄러입니다. (브라우저를 닫아도 수집됩니다)")
@@ -51,6 +43,12 @@ def save_config(new_conf):
 
 config = load_config()
 
+# --- Shared Crawler ---
+# One instance per server process so the HTTP session (keep-alive) survives reruns
+@st.cache_resource
+def get_crawler():
+    return NaverLandCrawler()
+
 # --- Core Logic Function ---
 # Needs to be standalone so thread can call it (or static method)
 def run_collection_task(c_id, t_code):
@@ -64,7 +62,7 @@ def run_collection_task(c_id, t_code):
     now_str = time.strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{now_str}] [Scheduler] Start collection: {c_name}({c_id}), {t_label}")
     try:
-        crawler = NaverLandCrawler()
+        crawler = get_crawler()
         new_data = crawler.fetch_listings(complex_no=c_id, trade_type=t_code)
         if new_data:
             # Pass c_id to save_data for table selection
@@ -243,20 +241,31 @@ col_btn2.button("🛑 수집 중지", on_click=on_stop_click, width="stretch", d
 
 # --- Status Display ---
 st.sidebar.markdown("---")
-status_icon = "🟢" if scheduler.is_running else "🔴"
-st.sidebar.markdown(f"**상태:** {status_icon} {scheduler.status_msg}")
+status_box = st.sidebar.container()
 
-if scheduler.is_running:
-    next_ts = scheduler.next_run_time
-    if next_ts > 0:
-        remain = next_ts - time.time()
-        if remain < 0: remain = 0
-        st.sidebar.info(f"다음 수집: {int(remain)}초 후")
-        
-        # Current Targets
-        target_names = [COMPLEX_INFO.get(cid, cid) for cid in scheduler.target_complex_ids]
-        st.sidebar.caption(f"수집 대상: {', '.join(target_names)}")
+# Remember which batch this page render already reflects
+st.session_state.seen_run_time = scheduler.last_run_time
+
+def render_status():
+    status_icon = "🟢" if scheduler.is_running else "🔴"
+    st.markdown(f"**상태:** {status_icon} {scheduler.status_msg}")
+
+    if scheduler.is_running:
+        next_ts = scheduler.next_run_time
+        if next_ts > 0:
+            # Absolute wall-clock target: stays correct between status refreshes
+            st.info(f"⏳ 다음 수집: {time.strftime('%H:%M:%S', time.localtime(next_ts))}")
+            
+            # Current Targets
+            target_names = [COMPLEX_INFO.get(cid, cid) for cid in scheduler.target_complex_ids]
+            st.caption(f"수집 대상: {', '.join(target_names)}")
 
+    # New batch finished since the page was drawn -> full rerun to refresh the dashboard
+    if scheduler.last_run_time != st.session_state.get("seen_run_time"):
+        st.rerun()
+
+auto_refresh = False
+if scheduler.is_running:
     if st.sidebar.button("🔄 상태 새로고침"):
         st.rerun()
 
@@ -268,20 +277,17 @@ if scheduler.is_running:
         min_value=1, 
         value=1, 
         step=1,
-        help="브라우저 화면을 자동으로 새로고침하는 주기입니다."
+        help="상태 패널을 자동으로 갱신하는 주기입니다."
     )
     
     auto_refresh = st.sidebar.checkbox(f"⚡ 실시간 모니터링 켜기 ({monitor_interval_min}분 마다)", value=False)
-    
+
+with status_box:
     if auto_refresh:
-        refresh_ms = monitor_interval_min * 60 * 1000
-        st.components.v1.html(f"""
-            <script>
-                setTimeout(function(){{
-                    window.parent.location.reload();
-                }}, {refresh_ms});
-            </script>
-        """, height=0)
+        # Fragment rerun: only the status panel refreshes (no full page reload / websocket reconnect)
+        st.fragment(run_every=monitor_interval_min * 60)(render_status)()
+    else:
+        render_status()
 
 # Data Manage
 st.sidebar.markdown("---")
@@ -297,11 +303,9 @@ if data:
     
     # Format timestamp (Treat as Local time, ignore/drop UTC offset if present)
     if not df.empty and 'timestamp' in df.columns:
-        # 1. Convert to datetime
-        df['dt'] = pd.to_datetime(df['timestamp'], format='mixed', errors='coerce', utc=True)
-        
+        # 1. Convert to datetime (both stored forms are ISO8601 -> vectorized parse, no per-row guessing)
         # 2. Drop timezone (make naive) to keep the face value "00:20:13"
-        df['dt'] = df['dt'].dt.tz_localize(None)
+        df['dt'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce', utc=True).dt.tz_localize(None)
              
         # 3. Format
         df['fmt_ts'] = df['dt'].dt.strftime('%Y-%m-%d %H:%M:%S')
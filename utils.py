@@ -20,6 +20,16 @@ except Exception as e:
 
 DATA_FILE = "data.json" # Keep for fallback or migration, but primary is DB
 
+# --- Shared UI ---
+# Keep the page fully opaque while a rerun is in progress (used by app.py & svrapp.py).
+# Injected with st.html: a style-only payload skips markdown parsing on every rerun.
+BASE_CSS = """
+    .stApp { opacity: 1 !important; }
+    [data-testid="stAppViewContainer"] { opacity: 1 !important; }
+    [data-testid="stSidebar"] { opacity: 1 !important; }
+    header[data-testid="stHeader"] { opacity: 1 !important; }
+"""
+
 def get_kst_time():
     """Returns current time in KST (Korea Standard Time)."""
     kst = timezone(timedelta(hours=9))
@@ -44,11 +54,15 @@ def get_complex_id_by_name(name):
             return pid
     return None
 
-def load_data(target_complexes=None):
+def load_data(target_complexes=None, columns="*", raise_errors=False):
     """
     Loads data from Supabase complex-specific tables.
     Args:
         target_complexes (list): Optional. List of complex NAMES to filter by.
+        columns (str): Optional. Comma separated column list for the select
+                       (projection is applied server-side). Default "*".
+        raise_errors (bool): Optional. Re-raise Supabase errors instead of returning
+                             partial / empty data (for callers that cache the result).
     Returns: List of dictionaries (records).
     """
     if not IS_SUPABASE_READY:
@@ -77,7 +91,7 @@ def load_data(target_complexes=None):
             while True:
                 current_end = current_start + rows_per_batch - 1
                 try:
-                    response = supabase.table(table_name).select("*") \
+                    response = supabase.table(table_name).select(columns) \
                                 .order("timestamp", desc=True) \
                                 .range(current_start, current_end).execute()
                                 
@@ -97,12 +111,16 @@ def load_data(target_complexes=None):
                         
                 except Exception as loop_e:
                     print(f"[Supabase] Pagination error on {table_name}: {loop_e}")
+                    if raise_errors:
+                        raise
                     break
         
         return all_data
         
     except Exception as e:
         print(f"[Supabase] Load failed: {e}")
+        if raise_errors:
+            raise
         return []
 
 def save_data(new_items, complex_id="108064"):